@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
 from collections import deque
+from itertools import islice
 import math
 from simple_emotion_detector import SimpleEmotionDetector
 
@@ -181,12 +182,13 @@ class AdvancedAttentionDetector(SimpleEmotionDetector):
             
             # Check for blink (EAR drops below threshold)
             if len(self.eye_aspect_ratio_history) >= self.EAR_CONSEC_FRAMES:
-                recent_ears = list(self.eye_aspect_ratio_history)[-self.EAR_CONSEC_FRAMES:]
+                # Most recent first
+                recent_ears = list(islice(reversed(self.eye_aspect_ratio_history), self.EAR_CONSEC_FRAMES))
                 
                 # Blink if recent frames are below threshold
-                if all(ear < self.EAR_THRESHOLD for ear in recent_ears[-3:]):
+                if all(ear < self.EAR_THRESHOLD for ear in recent_ears[:3]):
                     # Check if it was above threshold before (blink start)
-                    if len(recent_ears) > 3 and recent_ears[-4] > self.EAR_THRESHOLD:
+                    if len(recent_ears) > 3 and recent_ears[3] > self.EAR_THRESHOLD:
                         self.blink_history.append(1)
                         return True
             
@@ -201,7 +203,7 @@ class AdvancedAttentionDetector(SimpleEmotionDetector):
             return 0.0
         
         # Count blinks in recent history (assuming ~30fps)
-        recent_blinks = sum(list(self.blink_history)[-30:])
+        recent_blinks = sum(islice(reversed(self.blink_history), 30))
         return recent_blinks / 30.0  # Blinks per second
     
     def detect_yawn(self, face_roi):
@@ -230,7 +232,7 @@ class AdvancedAttentionDetector(SimpleEmotionDetector):
             
             # Check if mouth has been open for consecutive frames
             if len(self.mouth_history) >= self.YAWN_CONSEC_FRAMES:
-                recent_mar = list(self.mouth_history)[-self.YAWN_CONSEC_FRAMES:]
+                recent_mar = islice(reversed(self.mouth_history), self.YAWN_CONSEC_FRAMES)
                 if all(m > self.YAWN_THRESHOLD for m in recent_mar):
                     return True, mar
             
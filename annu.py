@@ -7,11 +7,15 @@ import cv2
 import numpy as np
 from datetime import datetime
 import json
+import logging
 
 from database import db, User, Session, EmotionData, Feedback, ClassRoom, AttentionAlert, AttentionSummary
 
 # Import detectors
-from simple_emotion_detector import SimpleEmotionDetector
+from simple_emotion_detector import get_detector
+
+# Keep per-frame detector diagnostics out of production logs
+logging.getLogger("simple_emotion_detector").setLevel(logging.WARNING)
 
 # Try to import enhanced detector
 try:
@@ -26,7 +30,7 @@ if use_enhanced and EnhancedEmotionDetector:
     emotion_detector = EnhancedEmotionDetector()
     print("Using EnhancedEmotionDetector with eye tracking and attention monitoring")
 else:
-    emotion_detector = SimpleEmotionDetector()
+    emotion_detector = get_detector()
     print("Using SimpleEmotionDetector (basic emotion detection only)")
 
 app = Flask(__name__)
@@ -62,6 +66,12 @@ def _serialize_emotions(emotions_data):
         })
     return serialized
 
+def _detect_basic(image_bytes, frame):
+    """Run basic emotion detection, from the raw JPEG bytes when no color frame was decoded"""
+    if frame is None:
+        return emotion_detector.detect_emotion_from_jpeg_bytes(image_bytes)
+    return emotion_detector.detect_emotion(frame)
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
@@ -174,10 +184,13 @@ def process_emotion_data():
         image_data = data['image']
         session_id = data['session_id']
         
-        # Decode base64 image
+        # Decode base64 image; the simple detector decodes the JPEG straight to grayscale itself
         image_bytes = base64.b64decode(image_data.split(',')[1])
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        if hasattr(emotion_detector, 'detect_emotion_from_jpeg_bytes'):
+            frame = None
+        else:
+            nparr = np.frombuffer(image_bytes, np.uint8)
+            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
         # Detect emotions and attention features
         try:
@@ -197,7 +210,7 @@ def process_emotion_data():
                 blink_detected = attention_data.get('blink_count', 0) > 0
             else:
                 # Fallback to basic detection
-                processed_frame, emotions_data = emotion_detector.detect_emotion(frame)
+                processed_frame, emotions_data = _detect_basic(image_bytes, frame)
                 face_detected = len(emotions_data) > 0
                 attention_score = 0
                 attention_status = "Unknown"
@@ -207,7 +220,7 @@ def process_emotion_data():
                 blink_detected = False
         except Exception as e:
             print(f"Enhanced detection failed: {e}, using fallback")
-            processed_frame, emotions_data = emotion_detector.detect_emotion(frame)
+            processed_frame, emotions_data = _detect_basic(image_bytes, frame)
             face_detected = len(emotions_data) > 0
             attention_score = 0
             attention_status = "Unknown"
@@ -9,7 +9,7 @@ from datetime import datetime
 import json
 
 from database import db, User, Session, EmotionData, Feedback, ClassRoom
-from emotion_detector import EmotionDetector
+from emotion_detector import get_detector
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-change-this'
@@ -24,7 +24,7 @@ login_manager.init_app(app)
 login_manager.login_view = 'login'
 
 # Initialize emotion detector
-emotion_detector = EmotionDetector()
+emotion_detector = get_detector()
 
 @login_manager.user_loader
 def load_user(user_id):
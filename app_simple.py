@@ -7,12 +7,16 @@ import cv2
 import numpy as np
 from datetime import datetime
 import json
+import logging
 
 from database import db, User, Session, EmotionData, Feedback, ClassRoom, AttentionAlert, AttentionSummary
-from simple_emotion_detector import SimpleEmotionDetector
+from simple_emotion_detector import get_detector
 from advanced_attention_detector import AdvancedAttentionDetector
 from audio_processor import AudioProcessor
 
+# Keep per-frame detector diagnostics out of production logs
+logging.getLogger("simple_emotion_detector").setLevel(logging.WARNING)
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-change-this'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///emotion_detection.db'
@@ -31,7 +35,7 @@ try:
     print("Advanced attention detector initialized")
 except Exception as e:
     print(f"Failed to initialize advanced detector: {e}, falling back to simple detector")
-    emotion_detector = SimpleEmotionDetector()
+    emotion_detector = get_detector()
 
 audio_processor = AudioProcessor()
 
@@ -1,7 +1,11 @@
 import os
+import shutil
 import requests
 import zipfile
 
+# SavedModel export of the downloaded model, preferred by EmotionDetector
+SAVED_MODEL_DIR = "models/emotion_sm"
+
 def download_emotion_model():
     """Download pre-trained emotion detection model"""
     model_url = "https://github.com/oarriaga/face_classification/raw/master/trained_models/emotion_models/fer2013_mini_XCEPTION.102-0.66.hdf5"
@@ -10,50 +14,86 @@ def download_emotion_model():
     # Create models directory if it doesn't exist
     os.makedirs("models", exist_ok=True)
     
-    if not os.path.exists(model_path):
+    etag_path = model_path + ".etag"
+    
+    # Ask for the current ETag so an up-to-date model is not downloaded again
+    etag = None
+    try:
+        head = requests.head(model_url, allow_redirects=True)
+        etag = head.headers.get('ETag')
+    except Exception as e:
+        print(f"Could not check for model updates: {e}")
+    
+    cached_etag = None
+    if os.path.exists(etag_path):
+        with open(etag_path) as f:
+            cached_etag = f.read()
+    
+    if os.path.exists(model_path) and (etag is None or etag == cached_etag):
+        print("Model already exists!")
+    else:
         print("Downloading emotion detection model...")
+        tmp_path = model_path + ".part"
         try:
             response = requests.get(model_url, stream=True)
             response.raise_for_status()
             
-            with open(model_path, 'wb') as f:
+            # Write to a temporary file and rename so a partial download never replaces the model
+            with open(tmp_path, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=8192):
                     f.write(chunk)
+            os.replace(tmp_path, model_path)
+            
+            # The old export no longer matches the new weights
+            shutil.rmtree(SAVED_MODEL_DIR, ignore_errors=True)
+            
+            if etag:
+                with open(etag_path, 'w') as f:
+                    f.write(etag)
             
             print(f"Model downloaded successfully to {model_path}")
         except Exception as e:
             print(f"Error downloading model: {e}")
-            print("Creating a simple emotion detection model instead...")
-            create_simple_model()
-    else:
-        print("Model already exists!")
-
-def create_simple_model():
-    """Create a simple emotion detection model if download fails"""
-    import tensorflow as tf
-    from tensorflow.keras import layers, models
-    
-    # Create a simple CNN model for emotion detection
-    model = models.Sequential([
-        layers.Conv2D(32, (3, 3), activation='relu', input_shape=(48, 48, 1)),
-        layers.MaxPooling2D((2, 2)),
-        layers.Conv2D(64, (3, 3), activation='relu'),
-        layers.MaxPooling2D((2, 2)),
-        layers.Conv2D(64, (3, 3), activation='relu'),
-        layers.Flatten(),
-        layers.Dense(64, activation='relu'),
-        layers.Dropout(0.5),
-        layers.Dense(7, activation='softmax')  # 7 emotions
-    ])
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if os.path.exists(model_path):
+                print("Keeping the existing model")
+            else:
+                warn_no_model()
+                return
     
-    model.compile(optimizer='adam',
-                  loss='categorical_crossentropy',
-                  metrics=['accuracy'])
+    export_saved_model(model_path)
+
+def export_saved_model(model_path, export_dir=SAVED_MODEL_DIR):
+    """Export the HDF5 model as a SavedModel for faster loading"""
+    # Only skip when the export is newer than the model it was built from
+    if os.path.isdir(export_dir) and os.path.getmtime(export_dir) >= os.path.getmtime(model_path):
+        return
     
-    # Save the model
-    os.makedirs("models", exist_ok=True)
-    model.save("models/simple_emotion_model.h5")
-    print("Simple emotion model created!")
+    print("Exporting emotion model as SavedModel...")
+    tmp_dir = export_dir + ".part"
+    try:
+        import tensorflow as tf
+        
+        # Drop the stale export so the detector falls back to the .h5 if this fails
+        shutil.rmtree(export_dir, ignore_errors=True)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        model = tf.keras.models.load_model(model_path, compile=False)
+        model.save(tmp_dir, save_format='tf')
+        
+        # Move the finished export into place so a failed save never leaves a partial directory
+        os.replace(tmp_dir, export_dir)
+        print(f"SavedModel exported to {export_dir}")
+    except Exception as e:
+        print(f"Error exporting SavedModel: {e}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def warn_no_model():
+    """Handle a failed download without creating an untrained model"""
+    # An untrained CNN only produces random outputs, so the application
+    # falls back to heuristic emotion detection instead
+    print("Warning: No trained emotion model available")
+    print("The application will use basic emotion detection until the model is downloaded")
 
 if __name__ == "__main__":
     download_emotion_model()
@@ -5,112 +5,162 @@ from tensorflow.keras.models import load_model
 import os
 
 class EmotionDetector:
-    def __init__(self):
+    def __init__(self, model_path=None):
+        self.model_path = model_path
         self.emotion_labels = ['Angry', 'Disgust', 'Fear', 'Happy', 'Sad', 'Surprise', 'Neutral']
+        self._labels_arr = np.array(self.emotion_labels)
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         self.model = None
+        self._infer = None
         self.load_model()
+        
+        # Model presence is fixed after loading, so pick the predictor once here
+        if self.model is not None:
+            self._predict_batch = self._predict_batch_model
+        else:
+            self._predict_batch = self._predict_batch_heuristic
+        
+        self.warm_up()
+    
+    def warm_up(self):
+        """Run tiny synthetic inputs through the cascade and predictor so the first frame is fast"""
+        try:
+            self.face_cascade.detectMultiScale(np.zeros((96, 96), dtype=np.uint8), 1.3, 5)
+            self._predict_batch(np.zeros((1, 48, 48), dtype=np.uint8))
+        except Exception as e:
+            print(f"Error warming up emotion detector: {e}")
     
     def load_model(self):
         """Load the emotion detection model"""
         try:
-            # Try to load the downloaded model first
-            if os.path.exists("models/emotion_model.h5"):
+            # A path supplied by the caller skips the search below
+            if self.model_path is not None:
+                if os.path.isdir(self.model_path):
+                    self.model = tf.saved_model.load(self.model_path)
+                    self._infer = self.model.signatures['serving_default']
+                else:
+                    self.model = load_model(self.model_path)
+                print(f"Loaded emotion detection model from {self.model_path}")
+            # Prefer the SavedModel export, which loads without the HDF5 parser
+            elif os.path.isdir("models/emotion_sm"):
+                self.model = tf.saved_model.load("models/emotion_sm")
+                self._infer = self.model.signatures['serving_default']
+                print("Loaded emotion detection SavedModel")
+            # Try to load the downloaded model next
+            elif os.path.exists("models/emotion_model.h5"):
                 self.model = load_model("models/emotion_model.h5")
                 print("Loaded emotion detection model")
-            elif os.path.exists("models/simple_emotion_model.h5"):
-                self.model = load_model("models/simple_emotion_model.h5")
-                print("Loaded simple emotion detection model")
             else:
-                print("No model found, creating a basic one...")
-                self.create_basic_model()
+                print("No model found")
+                self.use_heuristic_fallback()
         except Exception as e:
             print(f"Error loading model: {e}")
-            self.create_basic_model()
+            self.use_heuristic_fallback()
     
-    def create_basic_model(self):
-        """Create a basic emotion detection model"""
-        from tensorflow.keras import layers, models
-        
-        model = models.Sequential([
-            layers.Conv2D(32, (3, 3), activation='relu', input_shape=(48, 48, 1)),
-            layers.MaxPooling2D((2, 2)),
-            layers.Conv2D(64, (3, 3), activation='relu'),
-            layers.MaxPooling2D((2, 2)),
-            layers.Conv2D(64, (3, 3), activation='relu'),
-            layers.Flatten(),
-            layers.Dense(64, activation='relu'),
-            layers.Dropout(0.5),
-            layers.Dense(7, activation='softmax')
-        ])
-        
-        model.compile(optimizer='adam',
-                      loss='categorical_crossentropy',
-                      metrics=['accuracy'])
-        
-        # Initialize with random weights (for demo purposes)
-        self.model = model
-        print("Created basic emotion detection model")
+    def use_heuristic_fallback(self):
+        """Fall back to heuristic emotion detection when no trained model is available"""
+        # An untrained CNN only produces random outputs, so skip it entirely
+        self.model = None
+        self._infer = None
+        print("Warning: No trained emotion model available, using basic emotion detection")
     
     def detect_emotion(self, frame):
         """Detect emotions in a frame"""
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
-            
-            emotions_data = []
-            
-            for (x, y, w, h) in faces:
-                # Extract face region
-                face_roi = gray[y:y+h, x:x+w]
-                face_roi = cv2.resize(face_roi, (48, 48))
-                face_roi = face_roi.reshape(1, 48, 48, 1)
-                face_roi = face_roi.astype('float32') / 255.0
-                
-                # Predict emotion
-                if self.model is not None:
-                    predictions = self.model.predict(face_roi, verbose=0)
-                    emotion_idx = np.argmax(predictions[0])
-                    emotion = self.emotion_labels[emotion_idx]
-                    confidence = float(predictions[0][emotion_idx])
-                else:
-                    # Fallback to basic emotion detection
-                    emotion, confidence = self.basic_emotion_detection(face_roi)
-                
-                emotions_data.append({
-                    'emotion': emotion,
-                    'confidence': confidence,
-                    'bbox': (x, y, w, h)
-                })
-                
-                # Draw rectangle around face
-                cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
-                
-                # Draw emotion text
-                cv2.putText(frame, f"{emotion}: {confidence:.2f}", 
-                           (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
-            
-            return frame, emotions_data
+            emotions_data = self.detect_emotion_only(frame)
+            return self.annotate(frame, emotions_data), emotions_data
             
         except Exception as e:
             print(f"Error in emotion detection: {e}")
             return frame, []
     
+    def detect_emotion_only(self, frame):
+        """Detect emotions in a frame without drawing any overlays"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+        
+        if len(faces) == 0:
+            return []
+        
+        # Extract and resize every face region into one batch
+        batch = np.stack([
+            cv2.resize(gray[y:y+h, x:x+w], (48, 48))
+            for (x, y, w, h) in faces
+        ])
+        
+        # Predict emotions for all faces at once
+        emotions, confidences = self._predict_batch(batch)
+        
+        emotions_data = []
+        for emotion, confidence, (x, y, w, h) in zip(emotions, confidences, faces):
+            emotions_data.append({
+                'emotion': emotion,
+                'confidence': confidence,
+                'bbox': (x, y, w, h)
+            })
+        
+        return emotions_data
+    
+    def _predict_batch_model(self, batch):
+        """Predict emotions for a batch of 48x48 face ROIs using the model"""
+        model_input = batch.reshape(-1, 48, 48, 1).astype('float32') / 255.0
+        if self._infer is not None:
+            outputs = self._infer(tf.constant(model_input))
+            predictions = next(iter(outputs.values())).numpy()
+        else:
+            predictions = self.model.predict(model_input, verbose=0)
+        
+        # Decode the top-1 emotion for the whole batch at once
+        emotion_idx = predictions.argmax(axis=1)
+        confidences = predictions[np.arange(len(emotion_idx)), emotion_idx].astype(float)
+        return self._labels_arr[emotion_idx].tolist(), confidences.tolist()
+    
+    def _predict_batch_heuristic(self, batch):
+        """Predict emotions for a batch of 48x48 face ROIs using heuristics"""
+        emotions = []
+        confidences = []
+        for face_roi in batch:
+            emotion, confidence = self.basic_emotion_detection(face_roi)
+            emotions.append(emotion)
+            confidences.append(confidence)
+        return emotions, confidences
+    
+    def annotate(self, frame, emotions_data):
+        """Draw face rectangles and emotion labels onto the frame"""
+        if not emotions_data:
+            return frame
+        
+        # Draw all face rectangles with a single polylines call
+        boxes = np.array([
+            [[x, y], [x+w, y], [x+w, y+h], [x, y+h]]
+            for (x, y, w, h) in (data['bbox'] for data in emotions_data)
+        ], dtype=np.int32)
+        cv2.polylines(frame, boxes, True, (255, 0, 0), 2)
+        
+        # Draw emotion text
+        for data in emotions_data:
+            x, y = data['bbox'][:2]
+            cv2.putText(frame, f"{data['emotion']}: {data['confidence']:.2f}", 
+                       (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+        
+        return frame
+    
     def basic_emotion_detection(self, face_roi):
         """Basic emotion detection using simple heuristics"""
         # This is a simplified version for demo purposes
         # In a real implementation, you'd use a trained model
         
-        # Calculate some basic features
-        mean_intensity = np.mean(face_roi)
-        std_intensity = np.std(face_roi)
+        # Calculate mean and standard deviation in a single pass over the uint8 ROI
+        mean, stddev = cv2.meanStdDev(face_roi)
+        mean_intensity = float(mean[0, 0])
+        std_intensity = float(stddev[0, 0])
         
-        # Simple heuristic-based emotion detection
-        if mean_intensity < 0.3:
+        # Simple heuristic-based emotion detection (thresholds on the 0-255 scale)
+        if mean_intensity < 0.3 * 255:
             return "Sad", 0.7
-        elif mean_intensity > 0.7:
+        elif mean_intensity > 0.7 * 255:
             return "Happy", 0.7
-        elif std_intensity > 0.2:
+        elif std_intensity > 0.2 * 255:
             return "Surprise", 0.6
         else:
             return "Neutral", 0.8
@@ -146,6 +196,16 @@ class EmotionDetector:
             return total_score / total_confidence
         return 0
 
+# Shared detector instance, created on the first get_detector() call
+_detector = None
+
+def get_detector(model_path=None):
+    """Return the shared EmotionDetector, loading the model on first use"""
+    global _detector
+    if _detector is None:
+        _detector = EmotionDetector(model_path)
+    return _detector
+
 # Test the emotion detector
 if __name__ == "__main__":
     detector = EmotionDetector()
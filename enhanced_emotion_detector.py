@@ -2,9 +2,95 @@ import cv2
 import numpy as np
 import os
 import random
-from datetime import datetime, timedelta
-from collections import deque
 import math
+import threading
+from collections import namedtuple
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Width of the downscaled image used for face detection
+DETECT_W = 320
+
+# Use the green channel as a cheap grayscale proxy (faster, slightly less accurate)
+FAST_GRAY = False
+
+# Emotions (and their weights) picked at random when the heuristics are inconclusive
+FALLBACK_EMOTIONS = ("Happy", "Neutral", "Surprise")
+FALLBACK_WEIGHTS = (0.4, 0.4, 0.2)
+
+# Side of the square face crop used for feature extraction, and its Canny thresholds
+FEATURE_SIZE = 48
+CANNY_LOW = 50
+CANNY_HIGH = 150
+
+# Laplacian variance (default aperture, on the 48x48 crop) at which the
+# sharpness term of the face quality score saturates
+SHARPNESS_SCALE = 2500.0
+
+# Intensity, sharpness and edge statistics shared by emotion and quality checks
+FaceFeatures = namedtuple('FaceFeatures', ['mean', 'std', 'sharpness', 'edge_density', 'mouth_mean'])
+
+# Number of frames kept in the attention history ring buffers (5 minutes at 1 FPS)
+HISTORY_SIZE = 300
+
+def _ring_tail(buffer, count, n):
+    """Return the last n entries of a ring buffer that has received count writes"""
+    n = min(n, count)
+    end = count % len(buffer)
+    if n <= end:
+        return buffer[end - n:end]
+    return np.concatenate((buffer[end - n:], buffer[:end]))
+
+def _attention_score_kernel(face_detection_rate, yaw, pitch, eyes_closed, gaze_off,
+                            emotion_ids, emotion_counts, emotion_weights, head_thr):
+    """Combine the recent history windows into an attention score (0-100)
+    
+    Penalties and weights are accumulated record by record, in the same order
+    as the original per-record loops, so scores at the status thresholds
+    round exactly the same way.
+    """
+    # Score from head pose (looking towards screen); penalize large head turns
+    head_pose_score = 1.0
+    for i in range(len(yaw)):
+        if abs(yaw[i]) > head_thr:
+            head_pose_score -= 0.2
+        if abs(pitch[i]) > head_thr:
+            head_pose_score -= 0.1
+    
+    # Score from eye gaze
+    eye_gaze_score = 1.0
+    for i in range(len(eyes_closed)):
+        if eyes_closed[i]:
+            eye_gaze_score -= 0.3
+        if gaze_off[i]:
+            eye_gaze_score -= 0.2
+    
+    # Score from emotion engagement, summing each emotion once in order of first appearance
+    emotion_score = 0.5  # Default neutral
+    if len(emotion_ids) > 0:
+        seen = np.zeros(len(emotion_weights), dtype=np.bool_)
+        weighted_sum = 0.0
+        for e in emotion_ids:
+            if not seen[e]:
+                seen[e] = True
+                weighted_sum += emotion_weights[e] * emotion_counts[e]
+        emotion_score = weighted_sum / len(emotion_ids)
+    
+    # Calculate final attention score
+    attention_score = (
+        face_detection_rate * 0.3 +
+        max(0.0, head_pose_score) * 0.25 +
+        max(0.0, eye_gaze_score) * 0.25 +
+        emotion_score * 0.2
+    ) * 100
+    
+    return min(100.0, max(0.0, attention_score))
+
+# Compile the scoring kernel to native code when numba is installed
+_attention_score = njit(cache=True)(_attention_score_kernel) if njit is not None else _attention_score_kernel
 
 class EnhancedEmotionDetector:
     def __init__(self):
@@ -12,22 +98,70 @@ class EnhancedEmotionDetector:
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
         
-        # Attention monitoring parameters
-        self.attention_history = deque(maxlen=300)  # 5 minutes at 1 FPS
-        self.emotion_history = deque(maxlen=300)
-        self.face_presence_history = deque(maxlen=300)
-        self.head_pose_history = deque(maxlen=60)  # 1 minute history for head pose
+        # Run the frame preprocessing and face cascade through OpenCL (T-API) when available
+        self.use_opencl = self._initialize_opencl()
+        
+        # Attention monitoring history, kept as fixed-size ring buffers with one
+        # array per field; frame_count and emotion_count are total writes so far and
+        # double as monotonic record indices (the windows are "last N records")
+        self.face_det = np.zeros(HISTORY_SIZE, dtype=np.uint8)
+        self.yaw = np.zeros(HISTORY_SIZE, dtype=np.float64)
+        self.pitch = np.zeros(HISTORY_SIZE, dtype=np.float64)
+        self.eyes_closed = np.zeros(HISTORY_SIZE, dtype=np.uint8)
+        self.gaze_off = np.zeros(HISTORY_SIZE, dtype=np.uint8)
+        self.frame_count = 0
+        
+        self.emotion_id = np.zeros(HISTORY_SIZE, dtype=np.int8)
+        self.emotion_count = 0
+        self._emotion_index = {emotion: i for i, emotion in enumerate(self.emotion_labels)}
+        self._neutral_id = self._emotion_index['Neutral']
+        
+        # Running sums over the recent windows, updated as ring entries are replaced
+        self._face_sum_30 = 0
+        self._neutral_sum_300 = 0
+        self._emotion_count_30 = np.zeros(len(self.emotion_labels), dtype=np.int64)
+        
+        # Guards the ring buffers and running sums; re-entrant because the status
+        # computation calls the score computation
+        self._history_lock = threading.RLock()
+        
+        # Engagement weight for each emotion, aligned with self.emotion_labels
+        self.emotion_weight_vec = np.array([0.1, 0.1, 0.1, 1.0, 0.2, 0.8, 0.5], dtype=np.float64)
         
         # Attention thresholds
         self.NEUTRAL_DURATION_THRESHOLD = 300  # 5 minutes in seconds
         self.FACE_ABSENCE_THRESHOLD = 30  # 30 seconds
         self.BLINK_THRESHOLD = 0.3  # Eye aspect ratio threshold for blink detection
         self.HEAD_TURN_THRESHOLD = 30  # degrees
+        self.SCORE_REFRESH_FRAMES = 5  # Recompute score and status at most every N frames
+        
+        # Cached attention score and status, with the frame_count they were computed at
+        self._score_cache = 0
+        self._score_frame = 0
+        self._status_cache = "Unknown"
+        self._status_frame = 0
+        
+        # Last eye detections (in face ROI coordinates) and the face bbox they came from
+        self.EYE_CACHE_IOU = 0.9
+        self._last_bbox = None
+        self._last_eyes = np.empty((0, 4), dtype=np.int32)
+        self._frame_mod = 0
         
         # Initialize face landmarks detector (using simple approach)
         self.face_landmarks_detector = None
         self._initialize_landmarks_detector()
     
+    def _initialize_opencl(self):
+        """Enable OpenCV's OpenCL dispatch if an OpenCL device is available"""
+        try:
+            if not cv2.ocl.haveOpenCL():
+                return False
+            cv2.ocl.setUseOpenCL(True)
+            return cv2.ocl.useOpenCL()
+        except (AttributeError, cv2.error) as e:
+            print(f"OpenCL not available, using CPU image processing: {e}")
+            return False
+    
     def _initialize_landmarks_detector(self):
         """Initialize face landmarks detector using OpenCV's built-in methods"""
         try:
@@ -42,11 +176,38 @@ class EnhancedEmotionDetector:
         except ImportError:
             print("Dlib not available, using simple eye detection")
     
-    def detect_emotion_and_attention(self, frame):
-        """Enhanced emotion detection with attention monitoring"""
+    def detect_emotion_and_attention(self, frame, gray=None):
+        """Enhanced emotion detection with attention monitoring
+        
+        A grayscale version of the frame can be passed in as ``gray`` when the
+        caller already has one, which skips the color conversion.
+        """
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+            if gray is None:
+                # With OpenCL the frame stays a UMat on the device until pixels are needed
+                src = cv2.UMat(frame) if self.use_opencl else frame
+                gray = cv2.extractChannel(src, 1) if FAST_GRAY else cv2.cvtColor(src, cv2.COLOR_BGR2GRAY)
+            
+            # Detect faces on a downscaled copy; cascade cost scales with pixel count
+            height, width = frame.shape[:2]
+            scale = max(1.0, width / DETECT_W)
+            if scale > 1.0:
+                small = cv2.resize(gray, (DETECT_W, int(height / scale)), interpolation=cv2.INTER_AREA)
+            else:
+                small = gray
+            
+            # Equalize the small detection image (not the full frame) so the face
+            # cascade also finds faces in dim or low-contrast frames
+            small = cv2.equalizeHist(small)
+            faces = self.face_cascade.detectMultiScale(small, 1.3, 5, minSize=(24, 24))
+            
+            # Face ROIs are sliced with NumPy, so bring the gray frame back to the host
+            if isinstance(gray, cv2.UMat):
+                gray = gray.get()
+            
+            # Map detections back to full-resolution coordinates
+            if len(faces) > 0 and scale > 1.0:
+                faces = (faces * scale).astype(np.int32)
             
             emotions_data = []
             attention_data = {
@@ -60,17 +221,21 @@ class EnhancedEmotionDetector:
             
             if len(faces) > 0:
                 # Process the largest face (assuming main subject)
-                largest_face = max(faces, key=lambda x: x[2] * x[3])
+                areas = faces[:, 2].astype(np.int32) * faces[:, 3]
+                largest_face = faces[int(np.argmax(areas))]
                 x, y, w, h = largest_face
                 
                 # Extract face region
                 face_roi = gray[y:y+h, x:x+w]
                 
+                # Extract the face statistics once for emotion and quality checks
+                features = self._features(face_roi)
+                
                 # Detect emotion
-                emotion, confidence = self.simple_emotion_detection(face_roi)
+                emotion, confidence = self.simple_emotion_detection(face_roi, features)
                 
                 # Detect attention features
-                attention_features = self.detect_attention_features(frame, largest_face, gray)
+                attention_features = self.detect_attention_features(frame, largest_face, gray, features)
                 attention_data.update(attention_features)
                 
                 emotions_data.append({
@@ -115,21 +280,45 @@ class EnhancedEmotionDetector:
             print(f"Error in enhanced emotion detection: {e}")
             return frame, [], {'face_detected': False, 'attention_score': 0, 'status': 'Error'}
     
-    def detect_attention_features(self, frame, face_bbox, gray):
+    def detect_attention_features(self, frame, face_bbox, gray, features=None):
         """Detect various attention-related features"""
         x, y, w, h = face_bbox
         face_roi = gray[y:y+h, x:x+w]
         
+        # Detect eyes once and share them between head pose, gaze and blink detection;
+        # reuse the previous detections while the face stays put, refreshing every 4th frame
+        self._frame_mod += 1
+        if (self._last_bbox is not None and self._frame_mod & 3 != 0
+                and self._bbox_iou(face_bbox, self._last_bbox) > self.EYE_CACHE_IOU):
+            eyes = self._last_eyes
+        else:
+            eyes = self.eye_cascade.detectMultiScale(face_roi, 1.1, 3)
+            if len(eyes) > 0:
+                eyes = eyes[np.argsort(eyes[:, 0], kind='stable')]
+            self._last_bbox = tuple(int(v) for v in face_bbox)
+            self._last_eyes = eyes
+        
+        # Calculate eye aspect ratios once for both gaze and blink detection
+        ears = self.calculate_eye_aspect_ratios(eyes, face_roi).tolist() if len(eyes) >= 2 else []
+        
         attention_data = {
-            'head_pose': self.estimate_head_pose(face_roi),
-            'eye_gaze': self.detect_eye_gaze(face_roi),
-            'blink_count': self.detect_blinks(face_roi),
-            'face_quality': self.assess_face_quality(face_roi)
+            'head_pose': self.estimate_head_pose(face_roi, eyes),
+            'eye_gaze': self.detect_eye_gaze(face_roi, eyes, ears),
+            'blink_count': self.detect_blinks(ears),
+            'face_quality': self.assess_face_quality(face_roi, features)
         }
         
         return attention_data
     
-    def estimate_head_pose(self, face_roi):
+    def _bbox_iou(self, a, b):
+        """Intersection over union of two (x, y, w, h) boxes"""
+        ix = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+        iy = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+        inter = ix * iy
+        union = a[2] * a[3] + b[2] * b[3] - inter
+        return inter / union if union > 0 else 0.0
+    
+    def estimate_head_pose(self, face_roi, eyes):
         """Estimate head pose using simple computer vision techniques"""
         try:
             # Simple head pose estimation based on face symmetry and features
@@ -139,12 +328,8 @@ class EnhancedEmotionDetector:
             center_x = w // 2
             center_y = h // 2
             
-            # Detect eyes for pose estimation
-            eyes = self.eye_cascade.detectMultiScale(face_roi, 1.1, 3)
-            
             if len(eyes) >= 2:
-                # Sort eyes by x-coordinate
-                eyes = sorted(eyes, key=lambda x: x[0])
+                # Eyes are already sorted by x-coordinate
                 left_eye = eyes[0]
                 right_eye = eyes[1]
                 
@@ -177,20 +362,17 @@ class EnhancedEmotionDetector:
             print(f"Error in head pose estimation: {e}")
             return {'pitch': 0, 'yaw': 0, 'roll': 0}
     
-    def detect_eye_gaze(self, face_roi):
+    def detect_eye_gaze(self, face_roi, eyes, ears):
         """Detect eye gaze direction and eye openness"""
         try:
-            eyes = self.eye_cascade.detectMultiScale(face_roi, 1.1, 3)
-            
             if len(eyes) >= 2:
-                # Sort eyes by x-coordinate
-                eyes = sorted(eyes, key=lambda x: x[0])
+                # Eyes are already sorted by x-coordinate
                 left_eye = eyes[0]
                 right_eye = eyes[1]
                 
-                # Calculate eye aspect ratio for each eye
-                left_ear = self.calculate_eye_aspect_ratio(left_eye, face_roi)
-                right_ear = self.calculate_eye_aspect_ratio(right_eye, face_roi)
+                # Eye aspect ratio for each eye
+                left_ear = ears[0]
+                right_ear = ears[1]
                 
                 # Determine if eyes are open
                 left_eye_open = left_ear > self.BLINK_THRESHOLD
@@ -225,34 +407,26 @@ class EnhancedEmotionDetector:
                 'right_ear': 0.5
             }
     
-    def calculate_eye_aspect_ratio(self, eye_bbox, face_roi):
-        """Calculate Eye Aspect Ratio for blink detection"""
+    def calculate_eye_aspect_ratios(self, eyes, face_roi):
+        """Calculate Eye Aspect Ratios for all detected eyes in one vectorized gather"""
         try:
-            x, y, w, h = eye_bbox
-            eye_region = face_roi[y:y+h, x:x+w]
-            
-            # Calculate vertical and horizontal measurements
-            vertical_1 = eye_region[h//4, w//4]
-            vertical_2 = eye_region[3*h//4, w//4]
-            vertical_3 = eye_region[h//4, 3*w//4]
-            vertical_4 = eye_region[3*h//4, 3*w//4]
+            boxes = np.asarray(eyes, dtype=np.int32).reshape(-1, 4)
+            x, y, w, h = boxes.T
             
-            horizontal_1 = eye_region[h//2, 0]
-            horizontal_2 = eye_region[h//2, w-1]
+            # Four vertical sample points followed by two horizontal ones per eye
+            rows = np.stack([y + h//4, y + 3*h//4, y + h//4, y + 3*h//4, y + h//2, y + h//2], axis=1)
+            cols = np.stack([x + w//4, x + w//4, x + 3*w//4, x + 3*w//4, x, x + w - 1], axis=1)
+            rows = np.clip(rows, 0, face_roi.shape[0] - 1)
+            cols = np.clip(cols, 0, face_roi.shape[1] - 1)
+            samples = face_roi[rows, cols].astype(np.float32)
             
             # Calculate EAR
-            vertical_mean = (vertical_1 + vertical_2 + vertical_3 + vertical_4) / 4
-            horizontal_mean = (horizontal_1 + horizontal_2) / 2
-            
-            if horizontal_mean > 0:
-                ear = vertical_mean / horizontal_mean
-            else:
-                ear = 0.5
-            
-            return ear
+            vertical_mean = samples[:, :4].mean(axis=1)
+            horizontal_mean = samples[:, 4:].mean(axis=1)
+            return np.where(horizontal_mean > 0, vertical_mean / np.maximum(horizontal_mean, 1), 0.5)
             
         except Exception as e:
-            return 0.5
+            return np.full(len(eyes), 0.5)
     
     def estimate_gaze_direction(self, left_eye, right_eye, face_roi):
         """Estimate gaze direction based on eye positions"""
@@ -279,19 +453,12 @@ class EnhancedEmotionDetector:
         except Exception as e:
             return 'center'
     
-    def detect_blinks(self, face_roi):
+    def detect_blinks(self, ears):
         """Detect blinks using eye aspect ratio"""
         try:
-            eyes = self.eye_cascade.detectMultiScale(face_roi, 1.1, 3)
-            
-            if len(eyes) >= 2:
-                # Calculate average EAR for both eyes
-                total_ear = 0
-                for eye in eyes:
-                    ear = self.calculate_eye_aspect_ratio(eye, face_roi)
-                    total_ear += ear
-                
-                avg_ear = total_ear / len(eyes)
+            if len(ears) >= 2:
+                # Calculate average EAR over all detected eyes
+                avg_ear = sum(ears) / len(ears)
                 
                 # Count blinks based on EAR threshold
                 if avg_ear < self.BLINK_THRESHOLD:
@@ -304,25 +471,44 @@ class EnhancedEmotionDetector:
         except Exception as e:
             return 0
     
-    def assess_face_quality(self, face_roi):
+    def _features(self, face_roi):
+        """Extract face statistics from a single 48x48 resize"""
+        # Resize face to standard size; the arrays are allocated per call because
+        # one detector serves concurrent request threads
+        face_resized = cv2.resize(face_roi, (FEATURE_SIZE, FEATURE_SIZE))
+        
+        # Calculate basic intensity statistics in a single pass
+        mean, stddev = cv2.meanStdDev(face_resized)
+        
+        # Calculate sharpness using Laplacian variance (16-bit, no float64 temporary)
+        laplacian = cv2.Laplacian(face_resized, cv2.CV_16S)
+        sharpness = float(cv2.meanStdDev(laplacian)[1][0, 0] ** 2)
+        
+        # Calculate edge density (smile detection)
+        edges = cv2.Canny(face_resized, CANNY_LOW, CANNY_HIGH)
+        edge_density = cv2.countNonZero(edges) / (FEATURE_SIZE * FEATURE_SIZE)
+        
+        # Calculate mouth region (lower half of face)
+        mouth_mean = float(cv2.mean(face_resized[FEATURE_SIZE // 2:, :])[0])
+        
+        return FaceFeatures(float(mean[0, 0]), float(stddev[0, 0]), sharpness, edge_density, mouth_mean)
+    
+    def assess_face_quality(self, face_roi, features=None):
         """Assess the quality of face detection"""
         try:
-            # Calculate image quality metrics
-            mean_intensity = np.mean(face_roi)
-            std_intensity = np.std(face_roi)
-            
-            # Calculate sharpness using Laplacian variance
-            laplacian_var = cv2.Laplacian(face_roi, cv2.CV_64F).var()
+            if features is None:
+                features = self._features(face_roi)
+            laplacian_var = features.sharpness
             
             # Calculate brightness and contrast
-            brightness = mean_intensity / 255.0
-            contrast = std_intensity / 255.0
+            brightness = features.mean / 255.0
+            contrast = features.std / 255.0
             
             return {
                 'brightness': brightness,
                 'contrast': contrast,
                 'sharpness': laplacian_var,
-                'quality_score': min(1.0, (brightness * 0.3 + contrast * 0.3 + min(1.0, laplacian_var/1000) * 0.4))
+                'quality_score': min(1.0, (brightness * 0.3 + contrast * 0.3 + min(1.0, laplacian_var/SHARPNESS_SCALE) * 0.4))
             }
             
         except Exception as e:
@@ -335,147 +521,138 @@ class EnhancedEmotionDetector:
     
     def update_attention_history(self, attention_data, emotions_data):
         """Update attention monitoring history"""
-        current_time = datetime.now()
-        
-        # Update face presence history
-        self.face_presence_history.append({
-            'timestamp': current_time,
-            'face_detected': attention_data['face_detected']
-        })
-        
-        # Update emotion history
-        if emotions_data:
-            emotion = emotions_data[0]['emotion']
-            self.emotion_history.append({
-                'timestamp': current_time,
-                'emotion': emotion
-            })
-        
-        # Update head pose history
-        if attention_data.get('head_pose'):
-            self.head_pose_history.append({
-                'timestamp': current_time,
-                'head_pose': attention_data['head_pose']
-            })
-        
-        # Update overall attention history
-        self.attention_history.append({
-            'timestamp': current_time,
-            'attention_data': attention_data,
-            'emotions_data': emotions_data
-        })
+        # Running sums are read-modify-write, so concurrent updates must not interleave
+        with self._history_lock:
+            pos = self.frame_count % HISTORY_SIZE
+            
+            # Update face presence history, dropping the entry that leaves the 30 frame window
+            if self.frame_count >= 30:
+                self._face_sum_30 -= int(self.face_det[(self.frame_count - 30) % HISTORY_SIZE])
+            self.face_det[pos] = attention_data['face_detected']
+            self._face_sum_30 += int(self.face_det[pos])
+            
+            # Update head pose history
+            head_pose = attention_data.get('head_pose') or {'pitch': 0, 'yaw': 0}
+            self.yaw[pos] = head_pose['yaw']
+            self.pitch[pos] = head_pose['pitch']
+            
+            # Update eye gaze history
+            eye_gaze = attention_data.get('eye_gaze')
+            if eye_gaze:
+                self.eyes_closed[pos] = not (eye_gaze['left_eye_open'] and eye_gaze['right_eye_open'])
+                self.gaze_off[pos] = eye_gaze['gaze_direction'] != 'center'
+            else:
+                self.eyes_closed[pos] = 0
+                self.gaze_off[pos] = 0
+            
+            self.frame_count += 1
+            
+            # Update emotion history
+            if emotions_data:
+                emotion = emotions_data[0]['emotion']
+                # Unknown labels count as Neutral, which carries the default weight
+                emotion_id = self._emotion_index.get(emotion, self._neutral_id)
+                
+                # Drop the entries leaving the 30 and 300 record windows from the running sums
+                if self.emotion_count >= 30:
+                    self._emotion_count_30[self.emotion_id[(self.emotion_count - 30) % HISTORY_SIZE]] -= 1
+                epos = self.emotion_count % HISTORY_SIZE
+                if self.emotion_count >= HISTORY_SIZE and self.emotion_id[epos] == self._neutral_id:
+                    self._neutral_sum_300 -= 1
+                
+                self.emotion_id[epos] = emotion_id
+                self.emotion_count += 1
+                self._emotion_count_30[emotion_id] += 1
+                if emotion_id == self._neutral_id:
+                    self._neutral_sum_300 += 1
+    
+    def _score_cache_valid(self, cached_frame):
+        """Check whether a value cached at cached_frame can still be reused"""
+        return 0 < cached_frame and self.frame_count - cached_frame < self.SCORE_REFRESH_FRAMES
     
     def calculate_attention_score(self):
+        """Calculate overall attention score, cached for up to SCORE_REFRESH_FRAMES history updates
+        
+        The returned value can lag the latest history by up to
+        SCORE_REFRESH_FRAMES - 1 frames.
+        """
+        if not self._score_cache_valid(self._score_frame):
+            self._score_cache = self._compute_attention_score()
+            self._score_frame = self.frame_count
+        return self._score_cache
+    
+    def _compute_attention_score(self):
         """Calculate overall attention score based on multiple factors"""
-        try:
-            if not self.attention_history:
-                return 0
-            
-            # Base score from face detection
-            recent_faces = list(self.face_presence_history)[-30:]  # Last 30 seconds
-            face_detection_rate = sum(1 for f in recent_faces if f['face_detected']) / len(recent_faces) if recent_faces else 0
-            
-            # Score from head pose (looking towards screen)
-            head_pose_score = 1.0
-            if self.head_pose_history:
-                recent_poses = list(self.head_pose_history)[-10:]  # Last 10 seconds
-                for pose_data in recent_poses:
-                    pose = pose_data['head_pose']
-                    # Penalize large head turns
-                    if abs(pose['yaw']) > self.HEAD_TURN_THRESHOLD:
-                        head_pose_score -= 0.2
-                    if abs(pose['pitch']) > self.HEAD_TURN_THRESHOLD:
-                        head_pose_score -= 0.1
-            
-            # Score from eye gaze
-            eye_gaze_score = 1.0
-            recent_attention = list(self.attention_history)[-10:]  # Last 10 seconds
-            for att_data in recent_attention:
-                if att_data['attention_data'].get('eye_gaze'):
-                    gaze = att_data['attention_data']['eye_gaze']
-                    if not gaze['left_eye_open'] or not gaze['right_eye_open']:
-                        eye_gaze_score -= 0.3
-                    if gaze['gaze_direction'] != 'center':
-                        eye_gaze_score -= 0.2
-            
-            # Score from emotion engagement
-            emotion_score = 0.5  # Default neutral
-            if self.emotion_history:
-                recent_emotions = list(self.emotion_history)[-30:]  # Last 30 seconds
-                emotion_counts = {}
-                for emo_data in recent_emotions:
-                    emotion = emo_data['emotion']
-                    emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-                
-                # Weight emotions for engagement
-                emotion_weights = {
-                    'Happy': 1.0,
-                    'Surprise': 0.8,
-                    'Neutral': 0.5,
-                    'Sad': 0.2,
-                    'Angry': 0.1,
-                    'Fear': 0.1,
-                    'Disgust': 0.1
-                }
+        # Read the running sums and ring buffers as one consistent snapshot
+        with self._history_lock:
+            try:
+                if self.frame_count == 0:
+                    return 0
                 
-                total_weight = 0
-                weighted_sum = 0
-                for emotion, count in emotion_counts.items():
-                    weight = emotion_weights.get(emotion, 0.5)
-                    weighted_sum += weight * count
-                    total_weight += count
+                # Face detection rate over the last 30 seconds
+                face_detection_rate = self._face_sum_30 / min(self.frame_count, 30)
                 
-                if total_weight > 0:
-                    emotion_score = weighted_sum / total_weight
-            
-            # Calculate final attention score
-            attention_score = (
-                face_detection_rate * 0.3 +
-                max(0, head_pose_score) * 0.25 +
-                max(0, eye_gaze_score) * 0.25 +
-                emotion_score * 0.2
-            ) * 100
-            
-            return min(100, max(0, attention_score))
-            
-        except Exception as e:
-            print(f"Error calculating attention score: {e}")
-            return 0
+                return float(_attention_score(
+                    face_detection_rate,
+                    _ring_tail(self.yaw, self.frame_count, 10),  # Last 10 seconds
+                    _ring_tail(self.pitch, self.frame_count, 10),
+                    _ring_tail(self.eyes_closed, self.frame_count, 10),
+                    _ring_tail(self.gaze_off, self.frame_count, 10),
+                    _ring_tail(self.emotion_id, self.emotion_count, 30),  # Last 30 seconds
+                    self._emotion_count_30,
+                    self.emotion_weight_vec,
+                    self.HEAD_TURN_THRESHOLD
+                ))
+                
+            except Exception as e:
+                print(f"Error calculating attention score: {e}")
+                return 0
     
     def determine_attention_status(self):
+        """Determine attention status, cached for up to SCORE_REFRESH_FRAMES history updates
+        
+        The returned value can lag the latest history by up to
+        SCORE_REFRESH_FRAMES - 1 frames.
+        """
+        if not self._score_cache_valid(self._status_frame):
+            self._status_cache = self._compute_attention_status()
+            self._status_frame = self.frame_count
+        return self._status_cache
+    
+    def _compute_attention_status(self):
         """Determine attention status based on various factors"""
-        try:
-            attention_score = self.calculate_attention_score()
-            
-            # Check for face absence
-            if self.face_presence_history:
-                recent_faces = list(self.face_presence_history)[-30:]  # Last 30 seconds
-                face_detection_rate = sum(1 for f in recent_faces if f['face_detected']) / len(recent_faces)
-                
-                if face_detection_rate < 0.1:  # Less than 10% face detection
-                    return "Absent / Disengaged"
-            
-            # Check for prolonged neutral emotion
-            if self.emotion_history:
-                recent_emotions = list(self.emotion_history)[-300:]  # Last 5 minutes
-                neutral_count = sum(1 for e in recent_emotions if e['emotion'] == 'Neutral')
-                
-                if len(recent_emotions) > 0 and neutral_count / len(recent_emotions) > 0.8:
-                    return "Low Engagement"
-            
-            # Determine status based on attention score
-            if attention_score >= 80:
-                return "Attentive"
-            elif attention_score >= 50:
-                return "Partially Attentive"
-            elif attention_score >= 20:
-                return "Distracted"
-            else:
-                return "Inattentive"
+        # Read the running sums as one consistent snapshot
+        with self._history_lock:
+            try:
+                attention_score = self.calculate_attention_score()
                 
-        except Exception as e:
-            print(f"Error determining attention status: {e}")
-            return "Unknown"
+                # Check for face absence
+                if self.frame_count:
+                    face_detection_rate = self._face_sum_30 / min(self.frame_count, 30)  # Last 30 seconds
+                    
+                    if face_detection_rate < 0.1:  # Less than 10% face detection
+                        return "Absent / Disengaged"
+                
+                # Check for prolonged neutral emotion
+                if self.emotion_count:
+                    neutral_ratio = self._neutral_sum_300 / min(self.emotion_count, HISTORY_SIZE)  # Last 5 minutes
+                    
+                    if neutral_ratio > 0.8:
+                        return "Low Engagement"
+                
+                # Determine status based on attention score
+                if attention_score >= 80:
+                    return "Attentive"
+                elif attention_score >= 50:
+                    return "Partially Attentive"
+                elif attention_score >= 20:
+                    return "Distracted"
+                else:
+                    return "Inattentive"
+                    
+            except Exception as e:
+                print(f"Error determining attention status: {e}")
+                return "Unknown"
     
     def get_status_color(self, status):
         """Get color for status display"""
@@ -528,23 +705,13 @@ class EnhancedEmotionDetector:
         except Exception as e:
             print(f"Error drawing attention visualizations: {e}")
     
-    def simple_emotion_detection(self, face_roi):
+    def simple_emotion_detection(self, face_roi, features=None):
         """Simple emotion detection using basic computer vision (from original)"""
         try:
-            # Resize face to standard size
-            face_resized = cv2.resize(face_roi, (48, 48))
-            
             # Calculate basic features
-            mean_intensity = np.mean(face_resized)
-            std_intensity = np.std(face_resized)
-            
-            # Calculate edge density (smile detection)
-            edges = cv2.Canny(face_resized, 50, 150)
-            edge_density = np.sum(edges > 0) / (48 * 48)
-            
-            # Calculate mouth region (lower half of face)
-            mouth_region = face_resized[24:48, :]
-            mouth_mean = np.mean(mouth_region)
+            if features is None:
+                features = self._features(face_roi)
+            mean_intensity, std_intensity, _, edge_density, mouth_mean = features
             
             # Simple heuristic-based emotion detection
             if edge_density > 0.1 and mouth_mean > mean_intensity + 10:
@@ -559,9 +726,7 @@ class EnhancedEmotionDetector:
                 return "Angry", 0.6
             else:
                 # Add some randomness for demo purposes
-                emotions = ["Happy", "Neutral", "Surprise"]
-                weights = [0.4, 0.4, 0.2]
-                emotion = np.random.choice(emotions, p=weights)
+                emotion = random.choices(FALLBACK_EMOTIONS, FALLBACK_WEIGHTS, k=1)[0]
                 confidence = random.uniform(0.6, 0.9)
                 return emotion, confidence
                 
@@ -607,17 +772,19 @@ class EnhancedEmotionDetector:
             current_status = self.determine_attention_status()
             
             # Calculate statistics
-            total_records = len(self.attention_history)
+            total_records = min(self.frame_count, HISTORY_SIZE)
             face_detection_rate = 0
-            if self.face_presence_history:
-                face_detection_rate = sum(1 for f in self.face_presence_history if f['face_detected']) / len(self.face_presence_history)
+            if total_records:
+                face_detection_rate = float(self.face_det[:total_records].mean())
             
             # Emotion distribution
             emotion_distribution = {}
-            if self.emotion_history:
-                for emo_data in self.emotion_history:
-                    emotion = emo_data['emotion']
-                    emotion_distribution[emotion] = emotion_distribution.get(emotion, 0) + 1
+            if self.emotion_count:
+                emotion_ids = self.emotion_id[:min(self.emotion_count, HISTORY_SIZE)]
+                emotion_counts = np.bincount(emotion_ids, minlength=len(self.emotion_labels))
+                for emotion, count in zip(self.emotion_labels, emotion_counts):
+                    if count:
+                        emotion_distribution[emotion] = int(count)
             
             return {
                 'current_attention_score': current_score,
@@ -625,7 +792,7 @@ class EnhancedEmotionDetector:
                 'face_detection_rate': face_detection_rate,
                 'total_records': total_records,
                 'emotion_distribution': emotion_distribution,
-                'monitoring_duration_minutes': len(self.attention_history) / 60 if self.attention_history else 0
+                'monitoring_duration_minutes': total_records / 60
             }
             
         except Exception as e:
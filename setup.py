@@ -8,6 +8,7 @@ import os
 import sys
 import subprocess
 import platform
+from concurrent.futures import ThreadPoolExecutor
 
 def check_python_version():
     """Check if Python version is compatible"""
@@ -21,24 +22,38 @@ def check_python_version():
 def install_requirements():
     """Install required packages"""
     print("\n📦 Installing required packages...")
+    # Prefer wheels and reuse pip's cache so reruns don't rebuild packages from source
+    command = [sys.executable, "-m", "pip", "install", "--prefer-binary",
+               "--cache-dir", os.path.expanduser("~/.cache/pip"), "-r", "requirements.txt"]
+    if os.environ.get("NO_BUILD"):
+        # Never build from source (e.g. in Docker CI images)
+        command.insert(4, "--only-binary=:all:")
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
+        subprocess.check_call(command)
         print("✓ All packages installed successfully!")
         return True
     except subprocess.CalledProcessError as e:
         print(f"❌ Error installing packages: {e}")
         return False
 
-def download_model():
-    """Download the emotion detection model"""
+def start_model_download():
+    """Start downloading the emotion detection model in the background"""
     print("\n🤖 Downloading emotion detection model...")
     try:
-        subprocess.check_call([sys.executable, "download_model.py"])
-        print("✓ Model downloaded successfully!")
-        return True
-    except subprocess.CalledProcessError as e:
+        return subprocess.Popen([sys.executable, "download_model.py"])
+    except OSError as e:
         print(f"❌ Error downloading model: {e}")
+        return None
+
+def wait_for_model_download(process):
+    """Wait for the background model download to finish"""
+    if process is None:
+        return False
+    if process.wait() != 0:
+        print(f"❌ Error downloading model: exit code {process.returncode}")
         return False
+    print("✓ Model downloaded successfully!")
+    return True
 
 def create_directories():
     """Create necessary directories"""
@@ -52,54 +67,58 @@ def create_directories():
         "uploads"
     ]
     
+    # Create them concurrently, then report in order
+    with ThreadPoolExecutor(len(directories)) as executor:
+        list(executor.map(lambda d: os.makedirs(d, exist_ok=True), directories))
     for directory in directories:
-        os.makedirs(directory, exist_ok=True)
         print(f"✓ Created directory: {directory}")
 
 def setup_database():
-    """Initialize the database"""
+    """Initialize the database and create sample data"""
     print("\n🗄️ Setting up database...")
     try:
-        from app import app, db
+        # Import the app once and do all database work in a single app context
+        from app import app, db, User
         with app.app_context():
             db.create_all()
             print("✓ Database initialized successfully!")
+            
+            if not create_sample_data(db, User):
+                print("\n⚠️ Warning: Sample data creation failed, but setup can continue.")
         return True
     except Exception as e:
         print(f"❌ Error setting up database: {e}")
         return False
 
-def create_sample_data():
-    """Create sample data for testing"""
+def create_sample_data(db, User):
+    """Create sample data for testing (runs inside the app context)"""
     print("\n👥 Creating sample data...")
     try:
-        from app import app, db, User
         from werkzeug.security import generate_password_hash
         
-        with app.app_context():
-            # Check if default teacher exists
-            if not User.query.filter_by(username='teacher').first():
-                teacher = User(
-                    username='teacher',
-                    email='teacher@example.com',
-                    password_hash=generate_password_hash('password'),
-                    role='teacher'
-                )
-                db.session.add(teacher)
-                db.session.commit()
-                print("✓ Default teacher account created")
-            
-            # Check if sample student exists
-            if not User.query.filter_by(username='student').first():
-                student = User(
-                    username='student',
-                    email='student@example.com',
-                    password_hash=generate_password_hash('password'),
-                    role='student'
-                )
-                db.session.add(student)
-                db.session.commit()
-                print("✓ Sample student account created")
+        # Check if default teacher exists
+        if not User.query.filter_by(username='teacher').first():
+            teacher = User(
+                username='teacher',
+                email='teacher@example.com',
+                password_hash=generate_password_hash('password'),
+                role='teacher'
+            )
+            db.session.add(teacher)
+            db.session.commit()
+            print("✓ Default teacher account created")
+        
+        # Check if sample student exists
+        if not User.query.filter_by(username='student').first():
+            student = User(
+                username='student',
+                email='student@example.com',
+                password_hash=generate_password_hash('password'),
+                role='student'
+            )
+            db.session.add(student)
+            db.session.commit()
+            print("✓ Sample student account created")
         
         return True
     except Exception as e:
@@ -151,20 +170,21 @@ def main():
         print("Please install packages manually: pip install -r requirements.txt")
         return False
     
-    # Download model
-    if not download_model():
-        print("\n⚠️ Warning: Model download failed, but setup can continue.")
-        print("The application will create a basic model on first run.")
+    # Download model in the background while the local database is set up
+    download = start_model_download()
     
     # Setup database
-    if not setup_database():
+    database_ok = setup_database()
+    
+    # Wait for the model download before continuing
+    if not wait_for_model_download(download):
+        print("\n⚠️ Warning: Model download failed, but setup can continue.")
+        print("The application will use basic emotion detection until a model is available.")
+    
+    if not database_ok:
         print("\n❌ Setup failed at database initialization.")
         return False
     
-    # Create sample data
-    if not create_sample_data():
-        print("\n⚠️ Warning: Sample data creation failed, but setup can continue.")
-    
     # Print instructions
     print_instructions()
     return True
@@ -7,6 +7,7 @@ This script helps set up the project environment with minimal dependencies.
 import os
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 def check_python_version():
     """Check if Python version is compatible"""
@@ -20,8 +21,14 @@ def check_python_version():
 def install_simple_requirements():
     """Install simplified requirements"""
     print("\n📦 Installing simplified requirements...")
+    # Prefer wheels and reuse pip's cache so reruns don't rebuild packages from source
+    command = [sys.executable, "-m", "pip", "install", "--prefer-binary",
+               "--cache-dir", os.path.expanduser("~/.cache/pip"), "-r", "requirements_simple.txt"]
+    if os.environ.get("NO_BUILD"):
+        # Never build from source (e.g. in Docker CI images)
+        command.insert(4, "--only-binary=:all:")
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements_simple.txt"])
+        subprocess.check_call(command)
         print("✓ All packages installed successfully!")
         return True
     except subprocess.CalledProcessError as e:
@@ -40,54 +47,58 @@ def create_directories():
         "uploads"
     ]
     
+    # Create them concurrently, then report in order
+    with ThreadPoolExecutor(len(directories)) as executor:
+        list(executor.map(lambda d: os.makedirs(d, exist_ok=True), directories))
     for directory in directories:
-        os.makedirs(directory, exist_ok=True)
         print(f"✓ Created directory: {directory}")
 
 def setup_database():
-    """Initialize the database"""
+    """Initialize the database and create sample data"""
     print("\n🗄️ Setting up database...")
     try:
-        from app_simple import app, db
+        # Import the app once and do all database work in a single app context
+        from app_simple import app, db, User
         with app.app_context():
             db.create_all()
             print("✓ Database initialized successfully!")
+            
+            if not create_sample_data(db, User):
+                print("\n⚠️ Warning: Sample data creation failed, but setup can continue.")
         return True
     except Exception as e:
         print(f"❌ Error setting up database: {e}")
         return False
 
-def create_sample_data():
-    """Create sample data for testing"""
+def create_sample_data(db, User):
+    """Create sample data for testing (runs inside the app context)"""
     print("\n👥 Creating sample data...")
     try:
-        from app_simple import app, db, User
         from werkzeug.security import generate_password_hash
         
-        with app.app_context():
-            # Check if default teacher exists
-            if not User.query.filter_by(username='teacher').first():
-                teacher = User(
-                    username='teacher',
-                    email='teacher@example.com',
-                    password_hash=generate_password_hash('password'),
-                    role='teacher'
-                )
-                db.session.add(teacher)
-                db.session.commit()
-                print("✓ Default teacher account created")
-            
-            # Check if sample student exists
-            if not User.query.filter_by(username='student').first():
-                student = User(
-                    username='student',
-                    email='student@example.com',
-                    password_hash=generate_password_hash('password'),
-                    role='student'
-                )
-                db.session.add(student)
-                db.session.commit()
-                print("✓ Sample student account created")
+        # Check if default teacher exists
+        if not User.query.filter_by(username='teacher').first():
+            teacher = User(
+                username='teacher',
+                email='teacher@example.com',
+                password_hash=generate_password_hash('password'),
+                role='teacher'
+            )
+            db.session.add(teacher)
+            db.session.commit()
+            print("✓ Default teacher account created")
+        
+        # Check if sample student exists
+        if not User.query.filter_by(username='student').first():
+            student = User(
+                username='student',
+                email='student@example.com',
+                password_hash=generate_password_hash('password'),
+                role='student'
+            )
+            db.session.add(student)
+            db.session.commit()
+            print("✓ Sample student account created")
         
         return True
     except Exception as e:
@@ -144,10 +155,6 @@ def main():
         print("\n❌ Setup failed at database initialization.")
         return False
     
-    # Create sample data
-    if not create_sample_data():
-        print("\n⚠️ Warning: Sample data creation failed, but setup can continue.")
-    
     # Print instructions
     print_instructions()
     return True
@@ -1,241 +1,384 @@
 import cv2
 import numpy as np
 import os
-import random
+import functools
+import logging
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+logger = logging.getLogger(__name__)
+
+# Keep OpenCV single-threaded per worker; the web server runs frames in parallel threads
+cv2.setUseOptimized(True)
+cv2.setNumThreads(1)
+
+# YuNet face detection model used when use_yunet is enabled
+YUNET_MODEL_PATH = "models/face_detection_yunet_2023mar.onnx"
+
+# Sobel gradient magnitude above which a pixel counts as an edge, and the factor that
+# maps the resulting edge density onto the 0-1 range (about 1/3 of the old Canny x10 scale,
+# since the thresholded gradient marks roughly 3x as many pixels as thin Canny edges)
+EDGE_THRESHOLD = 60
+EDGE_DENSITY_SCALE = 3.3
+
+# Emotions in the order their heuristic scores are returned by _score_emotions
+EMOTION_NAMES = ('Happy', 'Sad', 'Surprise', 'Neutral', 'Angry', 'Fear', 'Disgust')
+
+# Weight different emotions for engagement
+_EMOTION_WEIGHTS = {
+    'Happy': 1.0,
+    'Surprise': 0.8,
+    'Neutral': 0.5,
+    'Sad': 0.2,
+    'Angry': 0.1,
+    'Fear': 0.1,
+    'Disgust': 0.1
+}
+
+def _score_emotions_kernel(mean_intensity, std_intensity, edge_density, eye_mean, mouth_mean,
+                           forehead_mean, symmetry_score):
+    """Score each emotion in EMOTION_NAMES from the face region statistics"""
+    # Normalize features to 0-1 range for consistent scoring
+    normalized_std = min(std_intensity / 50.0, 1.0)  # Cap at 50 for std
+    normalized_edge = min(edge_density * EDGE_DENSITY_SCALE, 1.0)  # Normalize edge density
+    
+    eye_diff = (eye_mean - mean_intensity) / 255.0
+    forehead_diff = (forehead_mean - mean_intensity) / 255.0
+    
+    # Analyze mouth curvature (smile vs frown)
+    mouth_curvature = (mouth_mean - mean_intensity) / 255.0
+    
+    # Analyze eyebrow region (forehead) for anger/frown
+    eyebrow_tension = abs(forehead_diff)
+    
+    # Analyze eye region for surprise/sadness
+    eye_aperture = abs(eye_diff)
+    
+    scores = np.zeros(7)
+    
+    # Happy
+    if mouth_curvature > 0.1 and normalized_edge > 0.12 and symmetry_score > 0.45 and eye_aperture < 0.1:
+        scores[0] = max(0.0, mouth_curvature * 3.0 + normalized_edge * 0.8 + symmetry_score * 0.4)
+    
+    # Sad
+    if mouth_curvature < -0.06 and (eye_diff < 0 or eyebrow_tension > 0.05):
+        scores[1] = max(0.0, abs(mouth_curvature) * 2.0 + (1 - symmetry_score) * 0.5 + eye_aperture * 0.6)
+    
+    # Surprise
+    if normalized_std > 0.28 and eye_aperture > 0.08 and mouth_curvature > -0.05:
+        scores[2] = max(0.0, normalized_std * 1.0 + eye_aperture * 0.8 + normalized_edge * 0.4)
+    
+    # Neutral
+    if abs(mouth_curvature) < 0.05 and normalized_std < 0.22 and symmetry_score > 0.4:
+        scores[3] = max(0.0, symmetry_score * 0.8 + (1 - normalized_std * 2) * 0.4 + (1 - abs(mouth_curvature) * 5) * 0.3)
+    
+    # Angry
+    if forehead_diff < -0.06 and mouth_curvature < 0 and symmetry_score < 0.7:
+        scores[4] = max(0.0, (1 - symmetry_score) * 0.8 + eyebrow_tension * 0.6 + abs(mouth_curvature) * 0.4)
+    
+    # Fear
+    if normalized_std > 0.22 and eye_aperture > 0.06 and mouth_curvature < -0.03:
+        scores[5] = max(0.0, normalized_std * 0.6 + eye_aperture * 0.5 + abs(mouth_curvature) * 0.3)
+    
+    # Disgust
+    if mouth_curvature < -0.04 and forehead_diff < -0.03 and symmetry_score < 0.75:
+        scores[6] = max(0.0, (1 - symmetry_score) * 0.6 + abs(mouth_curvature) * 0.5 + eyebrow_tension * 0.3)
+    
+    return scores
+
+# Compile the scoring kernel to native code when numba is installed
+_score_emotions = njit(cache=True, fastmath=True)(_score_emotions_kernel) if njit is not None else _score_emotions_kernel
+
+def _score_emotions_batch_kernel(features):
+    """Score every face in an (N, 7) feature array, one row of emotion scores per face"""
+    scores = np.zeros((features.shape[0], 7))
+    for i in range(features.shape[0]):
+        f = features[i]
+        scores[i] = _score_emotions(f[0], f[1], f[2], f[3], f[4], f[5], f[6])
+    return scores
+
+_score_emotions_batch = njit(cache=True)(_score_emotions_batch_kernel) if njit is not None else _score_emotions_batch_kernel
+
+@functools.lru_cache(maxsize=None)
+def _load_cascade(name):
+    """Load a Haar cascade once per process; later detectors share the classifier"""
+    clf = cv2.CascadeClassifier(cv2.data.haarcascades + name)
+    if not clf.empty():
+        print(f"Loaded cascade: {name}")
+    else:
+        print(f"Warning: Could not load cascade {name}")
+    return clf
 
 class SimpleEmotionDetector:
-    def __init__(self):
+    def __init__(self, use_yunet=False):
         self.emotion_labels = ['Angry', 'Disgust', 'Fear', 'Happy', 'Sad', 'Surprise', 'Neutral']
-        cascades = [
+        # Cascades are loaded on first use by the face_cascades property
+        self._cascade_names = [
             'haarcascade_frontalface_default.xml',
             'haarcascade_frontalface_alt2.xml',
             'haarcascade_profileface.xml'
         ]
-        self.face_cascades = []
-        for c in cascades:
-            path = cv2.data.haarcascades + c
-            clf = cv2.CascadeClassifier(path)
-            if not clf.empty():
-                print(f"Loaded cascade: {c}")
-                self.face_cascades.append(clf)
-            else:
-                print(f"Warning: Could not load cascade {c}")
-        if not self.face_cascades:
-            print("Error: No face cascades loaded; face detection will fail")
-        self.emotion_history = []
+        self._face_cascades = None
+        self.face_detector_yn = self._load_yunet() if use_yunet else None
+    
+    @property
+    def face_cascades(self):
+        """Face cascade classifiers, loaded the first time they are needed"""
+        if self._face_cascades is None:
+            # Build the list locally so other threads never see it half-filled
+            cascades = []
+            for c in self._cascade_names:
+                clf = _load_cascade(c)
+                if not clf.empty():
+                    cascades.append(clf)
+            if not cascades:
+                print("Error: No face cascades loaded; face detection will fail")
+            self._face_cascades = cascades
+        return self._face_cascades
+    
+    def _load_yunet(self):
+        """Load the YuNet DNN face detector, or None to keep using the Haar cascades"""
+        try:
+            if not os.path.exists(YUNET_MODEL_PATH):
+                print(f"Warning: {YUNET_MODEL_PATH} not found; using Haar cascades")
+                return None
+            detector = cv2.FaceDetectorYN.create(YUNET_MODEL_PATH, "", (320, 240), score_threshold=0.6)
+            print("Loaded YuNet face detector")
+            return detector
+        except (AttributeError, cv2.error) as e:
+            print(f"Warning: Could not load YuNet face detector ({e}); using Haar cascades")
+            return None
     
     def detect_emotion(self, frame):
         """Detect emotions in a frame using simple computer vision techniques"""
         try:
             # Check if frame is valid
             if frame is None or frame.size == 0:
-                print("Invalid frame received")
+                logger.debug("Invalid frame received")
                 return frame, []
 
-            # Convert to grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            # Enhance image contrast
-            gray = cv2.equalizeHist(gray)
-            
-            # Apply Gaussian blur to reduce noise
-            gray = cv2.GaussianBlur(gray, (5, 5), 0)
-            print(f"Image shape after preprocessing: {gray.shape}")
-            
-            # Optionally upscale small frames to aid detection
-            scale_up = 1.0
-            h0, w0 = gray.shape[:2]
-            if max(w0, h0) < 500:
-                scale_up = 2.0
-                gray = cv2.resize(gray, (int(w0 * scale_up), int(h0 * scale_up)))
-                print(f"Upscaled frame for detection: {gray.shape}")
-
-            # Try different detection parameters
-            detection_params = [
-                {'scale': 1.05, 'neighbors': 3, 'size': (30, 30)},
-                {'scale': 1.1, 'neighbors': 4, 'size': (40, 40)},
-                {'scale': 1.2, 'neighbors': 5, 'size': (50, 50)}
-            ]
-            
-            faces = []
-            for clf in self.face_cascades:
-                for params in detection_params:
-                    current_faces = clf.detectMultiScale(
-                        gray,
-                        scaleFactor=params['scale'],
-                        minNeighbors=params['neighbors'],
-                        minSize=params['size'],
-                        flags=cv2.CASCADE_SCALE_IMAGE
-                    )
-                    print(f"Cascade try -> faces: {len(current_faces)} (scale={params['scale']}, neighbors={params['neighbors']})")
-                    if len(current_faces) > 0:
-                        faces = current_faces
-                        break
-                if len(faces) > 0:
-                    break
-
-            # Map faces back to original scale if upscaled
-            if scale_up != 1.0 and len(faces) > 0:
-                mapped = []
-                for (x, y, w, h) in faces:
-                    mapped.append((int(x/scale_up), int(y/scale_up), int(w/scale_up), int(h/scale_up)))
-                faces = mapped
-            
-            emotions_data = []
-            
-            for (x, y, w, h) in faces:
-                # Add padding to face region
-                padding = int(0.1 * w)  # 10% padding
-                x = max(0, x - padding)
-                y = max(0, y - padding)
-                w = min(frame.shape[1] - x, w + 2*padding)
-                h = min(frame.shape[0] - y, h + 2*padding)
-                
-                # Extract face region
-                face_roi = gray[y:y+h, x:x+w]
-                
-                # Simple emotion detection based on facial features
-                emotion, confidence = self.simple_emotion_detection(face_roi)
-                
-                emotions_data.append({
-                    'emotion': emotion,
-                    'confidence': confidence,
-                    'bbox': (x, y, w, h)
-                })
-                
-                # Draw rectangle around face
-                cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
-                
-                # Draw emotion text
-                cv2.putText(frame, f"{emotion}: {confidence:.2f}", 
-                           (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+            if self.face_detector_yn is not None:
+                # YuNet works on the color frame and handles scale internally
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                faces = self._detect_faces_yunet(frame)
+            else:
+                gray, faces = self._detect_faces_cascade(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
             
-            return frame, emotions_data
+            return frame, self._classify_and_draw(frame, gray, faces)
             
         except Exception as e:
             print(f"Error in emotion detection: {e}")
             return frame, []
     
-    def simple_emotion_detection(self, face_roi):
-        """Simple emotion detection using basic computer vision"""
+    def detect_emotion_from_jpeg_bytes(self, buf):
+        """Detect emotions in an encoded JPEG/PNG image, decoding it straight to grayscale
+        
+        Returns the annotated grayscale image and the emotions data.
+        """
         try:
-            if face_roi is None or face_roi.size == 0:
-                return "Unknown", 0.0
-
-            # Resize face to standard size
-            face_resized = cv2.resize(face_roi, (48, 48))
-            
-            # Apply histogram equalization for better feature detection
-            face_resized = cv2.equalizeHist(face_resized)
+            arr = np.frombuffer(buf, np.uint8)
+            if self.face_detector_yn is not None:
+                # YuNet needs the color image
+                return self.detect_emotion(cv2.imdecode(arr, cv2.IMREAD_COLOR))
             
-            # Calculate basic features
-            mean_intensity = np.mean(face_resized)
-            std_intensity = np.std(face_resized)
+            gray = cv2.imdecode(arr, cv2.IMREAD_GRAYSCALE)
+            if gray is None or gray.size == 0:
+                logger.debug("Invalid frame received")
+                return gray, []
             
-            # Improved edge detection
-            edges = cv2.Canny(face_resized, 30, 150)
-            edge_density = np.sum(edges > 0) / (48 * 48)
+            detect_gray, faces = self._detect_faces_cascade(gray)
+            return gray, self._classify_and_draw(gray, detect_gray, faces)
             
-            # Calculate facial regions
-            eye_region = face_resized[10:24, :]
-            mouth_region = face_resized[30:42, :]
-            forehead_region = face_resized[0:10, :]
+        except Exception as e:
+            print(f"Error in emotion detection: {e}")
+            return None, []
+    
+    def _classify_and_draw(self, frame, gray, faces):
+        """Detect the emotion of each face and draw the results on the frame"""
+        emotions_data = []
+        
+        boxes = []
+        for (x, y, w, h) in faces:
+            # Add padding to face region
+            padding = int(0.1 * w)  # 10% padding
+            x = max(0, x - padding)
+            y = max(0, y - padding)
+            w = min(frame.shape[1] - x, w + 2*padding)
+            h = min(frame.shape[0] - y, h + 2*padding)
+            boxes.append((x, y, w, h))
+        
+        # Simple emotion detection based on facial features, all faces in one batch
+        results = self.classify_faces([gray[y:y+h, x:x+w] for (x, y, w, h) in boxes])
+        
+        for (x, y, w, h), (emotion, confidence) in zip(boxes, results):
+            emotions_data.append({
+                'emotion': emotion,
+                'confidence': confidence,
+                'bbox': (x, y, w, h)
+            })
             
-            # Calculate regional features
-            eye_mean = np.mean(eye_region)
-            mouth_mean = np.mean(mouth_region)
-            forehead_mean = np.mean(forehead_region)
+            # Draw rectangle around face
+            cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
             
-            # Calculate vertical symmetry
-            left_half = face_resized[:, :24]
-            right_half = face_resized[:, 24:]
-            symmetry_score = 1 - (np.mean(np.abs(left_half - np.fliplr(right_half))) / 255)
+            # Draw emotion text
+            cv2.putText(frame, f"{emotion}: {confidence:.2f}", 
+                       (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+        
+        return emotions_data
+    
+    def _detect_faces_yunet(self, frame):
+        """Detect faces with YuNet, returning (x, y, w, h) boxes"""
+        h, w = frame.shape[:2]
+        self.face_detector_yn.setInputSize((w, h))
+        _, detections = self.face_detector_yn.detect(frame)
+        if detections is None:
+            return []
+        return detections[:, :4].astype(np.int32)
+    
+    def _detect_faces_cascade(self, gray):
+        """Preprocess a grayscale frame and detect faces with the Haar cascades"""
+        # Enhance image contrast
+        gray = cv2.equalizeHist(gray)
+        logger.debug("Image shape after preprocessing: %s", gray.shape)
+        
+        # Optionally upscale small frames to aid detection
+        scale_up = 1.0
+        h0, w0 = gray.shape[:2]
+        if max(w0, h0) < 500:
+            scale_up = 2.0
+            gray = cv2.resize(gray, (int(w0 * scale_up), int(h0 * scale_up)))
+            logger.debug("Upscaled frame for detection: %s", gray.shape)
+        
+        faces = []
+        if self.face_cascades:
+            # Single tuned pass with the frontal face cascade; this finds the face in most frames
+            faces = self.face_cascades[0].detectMultiScale(
+                gray, scaleFactor=1.1, minNeighbors=4, minSize=(40, 40), flags=cv2.CASCADE_SCALE_IMAGE
+            )
+            if len(faces) == 0:
+                faces = self._detect_faces_fallback(gray)
+        
+        # Map faces back to original scale if upscaled
+        if scale_up != 1.0 and len(faces) > 0:
+            mapped = []
+            for (x, y, w, h) in faces:
+                mapped.append((int(x/scale_up), int(y/scale_up), int(w/scale_up), int(h/scale_up)))
+            faces = mapped
+        
+        return gray, faces
+    
+    def _detect_faces_fallback(self, gray):
+        """Try the remaining cascade and parameter combinations until one finds a face"""
+        # Try different detection parameters
+        detection_params = [
+            {'scale': 1.05, 'neighbors': 3, 'size': (30, 30)},
+            {'scale': 1.1, 'neighbors': 4, 'size': (40, 40)},
+            {'scale': 1.2, 'neighbors': 5, 'size': (50, 50)}
+        ]
+        
+        for i, clf in enumerate(self.face_cascades):
+            for params in detection_params:
+                # Already tried as the primary pass
+                if i == 0 and params['scale'] == 1.1:
+                    continue
+                faces = clf.detectMultiScale(
+                    gray,
+                    scaleFactor=params['scale'],
+                    minNeighbors=params['neighbors'],
+                    minSize=params['size'],
+                    flags=cv2.CASCADE_SCALE_IMAGE
+                )
+                if len(faces) > 0:
+                    return faces
+        return []
+    
+    def simple_emotion_detection(self, face_roi):
+        """Simple emotion detection using basic computer vision"""
+        return self.classify_faces([face_roi])[0]
+    
+    def classify_faces(self, face_rois):
+        """Detect the emotion of several face ROIs in one batch, returning (emotion, confidence) per face"""
+        results = [("Unknown", 0.0)] * len(face_rois)
+        valid = [i for i, roi in enumerate(face_rois) if roi is not None and roi.size > 0]
+        if not valid:
+            return results
+        
+        try:
+            # Resize faces to standard size and apply histogram equalization for better feature detection.
+            # Every feature depends on this per-face equalization, so the statistics can't be read
+            # from an integral image of the whole frame; the row sums below play that role per face.
+            batch = np.stack([cv2.equalizeHist(cv2.resize(face_rois[i], (48, 48))) for i in valid])
             
             # Enhanced heuristic-based emotion detection with better feature analysis
-            # Normalize features to 0-1 range for consistent scoring
-            normalized_std = min(std_intensity / 50.0, 1.0)  # Cap at 50 for std
-            normalized_edge = min(edge_density * 10, 1.0)  # Normalize edge density
-            
-            # Calculate mouth curvature (smile indicator)
-            mouth_diff = (mouth_mean - mean_intensity) / 255.0  # Positive = brighter mouth
-            eye_diff = (eye_mean - mean_intensity) / 255.0
-            forehead_diff = (forehead_mean - mean_intensity) / 255.0
-            
-            # Calculate emotion scores with improved feature analysis and better thresholds
-            # Analyze mouth curvature (smile vs frown)
-            mouth_curvature = (mouth_mean - mean_intensity) / 255.0
-            
-            # Analyze eyebrow region (forehead) for anger/frown
-            eyebrow_tension = abs(forehead_diff)
-            
-            # Analyze eye region for surprise/sadness
-            eye_aperture = abs(eye_diff)
-            
-            # Calculate emotion scores with more balanced and accurate thresholds
-            emotion_scores = {
-                'Happy': max(0, (mouth_curvature * 3.0 + normalized_edge * 0.8 + symmetry_score * 0.4)) 
-                         if (mouth_curvature > 0.1 and normalized_edge > 0.12 and symmetry_score > 0.45 and eye_aperture < 0.1) else 0,
-                
-                'Sad': max(0, (abs(mouth_curvature) * 2.0 + (1 - symmetry_score) * 0.5 + eye_aperture * 0.6)) 
-                        if (mouth_curvature < -0.06 and (eye_diff < 0 or eyebrow_tension > 0.05)) else 0,
-                
-                'Surprise': max(0, (normalized_std * 1.0 + eye_aperture * 0.8 + normalized_edge * 0.4)) 
-                           if (normalized_std > 0.28 and eye_aperture > 0.08 and mouth_curvature > -0.05) else 0,
-                
-                'Neutral': max(0, (symmetry_score * 0.8 + (1 - normalized_std * 2) * 0.4 + (1 - abs(mouth_curvature) * 5) * 0.3)) 
-                          if (abs(mouth_curvature) < 0.05 and normalized_std < 0.22 and symmetry_score > 0.4) else 0,
-                
-                'Angry': max(0, ((1 - symmetry_score) * 0.8 + eyebrow_tension * 0.6 + abs(mouth_curvature) * 0.4)) 
-                         if (forehead_diff < -0.06 and mouth_curvature < 0 and symmetry_score < 0.7) else 0,
-                
-                'Fear': max(0, (normalized_std * 0.6 + eye_aperture * 0.5 + abs(mouth_curvature) * 0.3)) 
-                        if (normalized_std > 0.22 and eye_aperture > 0.06 and mouth_curvature < -0.03) else 0,
-                
-                'Disgust': max(0, ((1 - symmetry_score) * 0.6 + abs(mouth_curvature) * 0.5 + eyebrow_tension * 0.3)) 
-                          if (mouth_curvature < -0.04 and forehead_diff < -0.03 and symmetry_score < 0.75) else 0
-            }
+            scores = _score_emotions_batch(self._batch_features(batch))
             
-            # Get the emotion with highest score
-            max_emotion = max(emotion_scores.items(), key=lambda x: x[1])
-            emotion, score = max_emotion
+            for i, result in zip(valid, self._select_emotions(scores)):
+                results[i] = result
+            return results
             
-            # Calculate confidence based on the difference between highest and second highest score
-            sorted_scores = sorted(emotion_scores.values(), reverse=True)
-            if len(sorted_scores) > 1 and sorted_scores[0] > 0:
-                score_diff = sorted_scores[0] - sorted_scores[1]
-                confidence = 0.5 + min(score_diff * 2, 0.5)  # Confidence based on score separation
-            else:
-                confidence = 0.6  # Default confidence if scores are too close
-            
-            # Normalize confidence to 0.5-0.9 range (more conservative)
-            confidence = min(0.9, max(0.5, confidence))
-            
-            # If all scores are very low or too close, return neutral with moderate confidence
-            if score < 0.18 or (len(sorted_scores) > 1 and sorted_scores[0] - sorted_scores[1] < 0.05):
-                return "Neutral", 0.65
-                
-            return emotion, confidence
-                
         except Exception as e:
             print(f"Error in simple emotion detection: {e}")
-            return "Neutral", 0.5
+            return [("Neutral", 0.5)] * len(face_rois)
+    
+    def _batch_features(self, batch):
+        """Compute the heuristic features of an (N, 48, 48) face batch, one row per face"""
+        # Row sums and squared row sums, from which all region statistics are derived
+        row_sum = batch.sum(axis=2, dtype=np.int32)
+        row_sqsum = np.einsum('nij,nij->ni', batch, batch, dtype=np.int32)
+        
+        # Calculate basic features
+        mean_intensity = row_sum.sum(axis=1) / (48 * 48)
+        std_intensity = np.sqrt(np.maximum(0.0, row_sqsum.sum(axis=1) / (48 * 48) - mean_intensity ** 2))
+        
+        # Edge density from the Sobel gradient magnitude (no hysteresis pass needed)
+        edge_density = np.array([self._edge_density(face) for face in batch])
+        
+        # Calculate regional features from the sums of rows 0-10 (forehead), 10-24 (eyes),
+        # 24-30, 30-42 (mouth) and 42-48
+        region_sums = np.add.reduceat(row_sum, [0, 10, 24, 30, 42], axis=1)
+        forehead_mean = region_sums[:, 0] / (10 * 48)
+        eye_mean = region_sums[:, 1] / (14 * 48)
+        mouth_mean = region_sums[:, 3] / (12 * 48)
+        
+        # Calculate vertical symmetry; subtract in int16 so differences don't wrap around in uint8
+        faces = batch.astype(np.int16)
+        symmetry_score = 1 - (np.abs(faces[:, :, :24] - faces[:, :, :23:-1]).mean(axis=(1, 2)) / 255)
+        
+        return np.column_stack((mean_intensity, std_intensity, edge_density, eye_mean, mouth_mean,
+                                forehead_mean, symmetry_score))
+    
+    def _edge_density(self, face):
+        """Fraction of pixels whose Sobel gradient magnitude exceeds EDGE_THRESHOLD"""
+        gx = cv2.Sobel(face, cv2.CV_16S, 1, 0, ksize=3)
+        gy = cv2.Sobel(face, cv2.CV_16S, 0, 1, ksize=3)
+        magnitude = cv2.absdiff(gx, 0) + cv2.absdiff(gy, 0)
+        return cv2.countNonZero(cv2.compare(magnitude, EDGE_THRESHOLD, cv2.CMP_GT)) / (48 * 48)
+    
+    def _select_emotions(self, scores):
+        """Pick the emotion and confidence for each row of an (N, 7) score array"""
+        # Get the emotion with highest score, and the two highest scores
+        best = scores.argmax(axis=1)
+        top_two = np.partition(scores, -2, axis=1)
+        score_diff = top_two[:, -1] - top_two[:, -2]
+        
+        # Confidence based on the score separation, normalized to 0.5-0.9 range (more conservative)
+        confidence = np.where(top_two[:, -1] > 0, 0.5 + np.minimum(score_diff * 2, 0.5), 0.6)
+        confidence = np.clip(confidence, 0.5, 0.9)
+        
+        # If all scores are very low or too close, return neutral with moderate confidence
+        uncertain = (top_two[:, -1] < 0.18) | (score_diff < 0.05)
+        
+        return [("Neutral", 0.65) if u else (EMOTION_NAMES[b], float(c))
+                for b, c, u in zip(best, confidence, uncertain)]
     
     def get_engagement_score(self, emotions_data):
         """Calculate engagement score based on emotions"""
         if not emotions_data:
             return 0
         
-        # Weight different emotions for engagement
-        emotion_weights = {
-            'Happy': 1.0,
-            'Surprise': 0.8,
-            'Neutral': 0.5,
-            'Sad': 0.2,
-            'Angry': 0.1,
-            'Fear': 0.1,
-            'Disgust': 0.1
-        }
-        
         total_score = 0
         total_confidence = 0
         
@@ -243,7 +386,7 @@ class SimpleEmotionDetector:
             emotion = emotion_data['emotion']
             confidence = emotion_data['confidence']
             
-            weight = emotion_weights.get(emotion, 0.5)
+            weight = _EMOTION_WEIGHTS.get(emotion, 0.5)
             total_score += weight * confidence
             total_confidence += confidence
         
@@ -251,7 +394,14 @@ class SimpleEmotionDetector:
             return total_score / total_confidence
         return 0
 
+@functools.lru_cache(maxsize=1)
+def get_detector():
+    """Return the shared SimpleEmotionDetector, creating it on first use"""
+    return SimpleEmotionDetector()
+
 # Test the emotion detector
 if __name__ == "__main__":
-    detector = SimpleEmotionDetector()
+    # Standalone use has the whole machine to itself
+    cv2.setNumThreads(os.cpu_count() or 1)
+    detector = get_detector()
     print("Simple emotion detector initialized successfully!")